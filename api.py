@@ -10,49 +10,124 @@ Endpoints:
   POST /recommend                → same, via JSON body
 
 Run:
-    uvicorn api:app --reload --port 8000
+    uvicorn api:app --reload --port 8000                                    # dev
+    uvicorn api:app --workers 4 --loop uvloop --http httptools --port 8000  # prod
 
 Swagger UI:  http://127.0.0.1:8000/docs
 ReDoc:       http://127.0.0.1:8000/redoc
 """
 
-from contextlib import asynccontextmanager
+import asyncio
+from contextlib import asynccontextmanager, suppress
 from typing import Optional
 
-from fastapi import FastAPI, Query, HTTPException
+from fastapi import FastAPI, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel, Field
 
 from engine import SemanticEngine
 
-# ── App lifecycle  ────────────────────────────────────────────────────────────
-# The engine is loaded once at startup and shared across all requests.
+# ── Config ────────────────────────────────────────────────────────────────────
+BATCH_WINDOW_S = 0.005    # how long the batcher waits for more queries
+MAX_BATCH      = 32       # queries per engine.recommend_batch call
+
+
+# ── Request coalescing ────────────────────────────────────────────────────────
+class QueryBatcher:
+    """
+    Coalesces concurrent /recommend calls.
+
+    Queries arriving within BATCH_WINDOW_S of each other are answered by a
+    single engine.recommend_batch() call (one encode, one index query) run
+    off the event loop; each caller awaits its own Future.  While a batch is
+    being served the next one queues up, so batches grow with load.
+    """
+
+    def __init__(self, engine: SemanticEngine):
+        self.engine = engine
+        self.queue: asyncio.Queue[tuple[str, int, asyncio.Future]] = asyncio.Queue()
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._task
+
+    async def submit(self, query: str, n_results: int) -> list[dict]:
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((query, n_results, future))
+        return await future
+
+    async def _run(self) -> None:
+        while True:
+            items = [await self.queue.get()]
+            await asyncio.sleep(BATCH_WINDOW_S)
+            while len(items) < MAX_BATCH:
+                try:
+                    items.append(self.queue.get_nowait())
+                except asyncio.QueueEmpty:
+                    break
+
+            queries = [query for query, _, _ in items]
+            n_max   = max(n for _, n, _ in items)
+            try:
+                batch = await asyncio.to_thread(self.engine.recommend_batch, queries, n_max)
+            except Exception:  # noqa: BLE001 — retried per query below to find the culprit
+                # One bad query must not fail the requests batched with it:
+                # rerun each on its own so only the failing caller gets the error.
+                for query, n, future in items:
+                    try:
+                        results = (await asyncio.to_thread(self.engine.recommend_batch, [query], n))[0]
+                    except Exception as exc:  # noqa: BLE001 — surfaced to the caller via its future
+                        if not future.done():
+                            future.set_exception(exc)
+                    else:
+                        if not future.done():
+                            future.set_result(results)
+                continue
+
+            for (_, n, future), results in zip(items, batch):
+                if not future.done():          # caller may have disconnected
+                    future.set_result(results[:n])
 
-engine_instance: Optional[SemanticEngine] = None
 
+# ── App lifecycle  ────────────────────────────────────────────────────────────
+# The engine is loaded once per worker at startup and kept on app.state.
+# Uvicorn only serves requests after lifespan startup has finished, so
+# routes can use it without checking that it exists.
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Load the engine when the server starts; clean up on shutdown."""
-    global engine_instance
     print("[API] Initialising Semantic Engine …")
-    engine_instance = SemanticEngine()
+    engine = SemanticEngine()
     # Ensure the index exists (no-op if already indexed)
-    engine_instance.index()
+    engine.index()
+    app.state.engine  = engine
+    app.state.batcher = QueryBatcher(engine)
+    app.state.batcher.start()
     print("[API] Engine ready.")
     yield
     print("[API] Shutting down.")
+    await app.state.batcher.stop()
 
 
 # ── FastAPI app ───────────────────────────────────────────────────────────────
 app = FastAPI(
-    title       = "Semantic Discovery Engine",
-    description = (
+    title                  = "Semantic Discovery Engine",
+    description            = (
         "An NLP-powered movie recommender that solves the **Cold Start** problem. "
         "It understands the *meaning* of your query — no user history required."
     ),
-    version     = "1.0.0",
-    lifespan    = lifespan,
+    version                = "1.0.0",
+    lifespan               = lifespan,
+    # orjson serialises the result lists several times faster than json
+    default_response_class = ORJSONResponse,
 )
 
 # Allow the Streamlit frontend (any origin in dev) to call the API.
@@ -93,13 +168,6 @@ class StatsResponse(BaseModel):
     vector_dim   : int
 
 
-# ── Helper ────────────────────────────────────────────────────────────────────
-def _get_engine() -> SemanticEngine:
-    if engine_instance is None:
-        raise HTTPException(status_code=503, detail="Engine not initialised yet.")
-    return engine_instance
-
-
 # ── Routes ────────────────────────────────────────────────────────────────────
 @app.get("/", tags=["Health"])
 def root():
@@ -108,18 +176,20 @@ def root():
 
 
 @app.get("/stats", response_model=StatsResponse, tags=["Info"])
-def get_stats():
+def get_stats(request: Request):
     """Return metadata about the vector collection."""
-    return _get_engine().stats()
+    return request.app.state.engine.stats()
 
 
 @app.get(
     "/recommend",
-    response_model = RecommendResponse,
-    tags           = ["Recommendations"],
-    summary        = "Get recommendations via query string",
+    response_model              = RecommendResponse,
+    response_model_exclude_none = True,
+    tags                        = ["Recommendations"],
+    summary                     = "Get recommendations via query string",
 )
-def recommend_get(
+async def recommend_get(
+    request  : Request,
     query    : str = Query(..., example="funny movie about friendship", min_length=2),
     n        : int = Query(10, ge=1, le=50, description="Number of results"),
 ):
@@ -129,18 +199,18 @@ def recommend_get(
     - `query` — any natural-language description (e.g. *"action movie in space"*)
     - `n` — how many results to return (default 10, max 50)
     """
-    engine  = _get_engine()
-    results = engine.recommend(query=query, n_results=n)
+    results = await request.app.state.batcher.submit(query, n)
     return RecommendResponse(query=query, n_results=len(results), results=results)
 
 
 @app.post(
     "/recommend",
-    response_model = RecommendResponse,
-    tags           = ["Recommendations"],
-    summary        = "Get recommendations via JSON body",
+    response_model              = RecommendResponse,
+    response_model_exclude_none = True,
+    tags                        = ["Recommendations"],
+    summary                     = "Get recommendations via JSON body",
 )
-def recommend_post(payload: RecommendRequest):
+async def recommend_post(request: Request, payload: RecommendRequest):
     """
     Semantic search via **POST** (JSON body).
 
@@ -149,8 +219,7 @@ def recommend_post(payload: RecommendRequest):
     { "query": "I want a comedy about love and dogs", "n_results": 5 }
     ```
     """
-    engine  = _get_engine()
-    results = engine.recommend(query=payload.query, n_results=payload.n_results)
+    results = await request.app.state.batcher.submit(payload.query, payload.n_results)
     return RecommendResponse(
         query     = payload.query,
         n_results = len(results),
@@ -20,7 +20,7 @@ Requirements:
 
 import os
 import time
-import requests
+import httpx
 import streamlit as st
 
 # ── Config ────────────────────────────────────────────────────────────────────
@@ -61,6 +61,10 @@ def genre_pill(genre: str) -> str:
     )
 
 
+# Pre-rendered pills for every known genre (unknown ones are built on demand)
+GENRE_PILL_HTML = {g: genre_pill(g) for g in GENRE_COLOURS}
+
+
 def score_bar(score: float) -> str:
     pct    = int(score * 100)
     colour = "#2ecc71" if score >= 0.5 else "#f39c12" if score >= 0.3 else "#e74c3c"
@@ -72,15 +76,23 @@ def score_bar(score: float) -> str:
     )
 
 
-def movie_card(movie: dict, rank: int) -> str:
+# Keyed on the movie's genres/tags only, so the HTML is reused across
+# queries; the rank and score bar differ per query and are not cached.
+@st.cache_data(show_spinner=False, max_entries=4096)
+def genres_tags_html(genres: str, tags: str) -> tuple[str, str]:
     genres_html = "".join(
-        genre_pill(g) for g in movie["genres"].split() if g
+        GENRE_PILL_HTML.get(g) or genre_pill(g) for g in genres.split()
     )
-    tags_snippet = movie["tags"][:80] + "…" if len(movie["tags"]) > 80 else movie["tags"]
+    tags_snippet = tags[:80] + "…" if len(tags) > 80 else tags
     tags_html    = (
         f'<p style="font-size:0.8rem;color:#888;margin:4px 0">🏷 {tags_snippet}</p>'
         if tags_snippet else ""
     )
+    return genres_html, tags_html
+
+
+def movie_card(movie: dict, rank: int) -> str:
+    genres_html, tags_html = genres_tags_html(movie["genres"], movie["tags"])
 
     return f"""
     <div style="
@@ -106,12 +118,14 @@ def movie_card(movie: dict, rank: int) -> str:
     """
 
 
+@st.cache_resource
+def api_client() -> httpx.Client:
+    """One pooled keep-alive client per server process, shared across reruns."""
+    return httpx.Client(base_url=API_URL, timeout=30)
+
+
 def fetch_recommendations_api(query: str, n: int) -> list[dict]:
-    resp = requests.get(
-        f"{API_URL}/recommend",
-        params  = {"query": query, "n": n},
-        timeout = 30,
-    )
+    resp = api_client().get("/recommend", params={"query": query, "n": n})
     resp.raise_for_status()
     return resp.json()["results"]
 
@@ -223,9 +237,9 @@ if search_clicked and query.strip():
             else:
                 results = fetch_recommendations_api(query.strip(), n_results)
             elapsed = time.time() - t0
-        except requests.exceptions.ConnectionError:
+        except httpx.TransportError:    # refused, timed out, dropped …
             st.error(
-                f"Cannot connect to API at **{API_URL}**. "
+                f"Cannot reach API at **{API_URL}**. "
                 "Start with: `uvicorn api:app --reload --port 8000`  "
                 "or run in standalone mode: `STANDALONE=1 streamlit run app.py`"
             )
@@ -239,14 +253,11 @@ if search_clicked and query.strip():
             unsafe_allow_html=True,
         )
 
-        # Two-column card layout
+        # Two-column card layout — one markdown call per column
+        cards = [movie_card(movie, i + 1) for i, movie in enumerate(results)]
         left_col, right_col = st.columns(2)
-        for i, movie in enumerate(results):
-            card_html = movie_card(movie, i + 1)
-            if i % 2 == 0:
-                left_col.markdown(card_html, unsafe_allow_html=True)
-            else:
-                right_col.markdown(card_html, unsafe_allow_html=True)
+        left_col.markdown("".join(cards[0::2]), unsafe_allow_html=True)
+        right_col.markdown("".join(cards[1::2]), unsafe_allow_html=True)
     else:
         st.warning("No results found. Try a different query.")
 
@@ -262,7 +273,7 @@ else:
         </p>
         <p style='font-size:0.9rem'>
             Powered by <b style='color:#7c83fd'>all-MiniLM-L6-v2</b> embeddings
-            + <b style='color:#7c83fd'>ChromaDB</b> vector search
+            + <b style='color:#7c83fd'>hnswlib</b> / exact brute-force vector search
         </p>
     </div>
     """, unsafe_allow_html=True)
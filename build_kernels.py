@@ -0,0 +1,39 @@
+"""
+build_kernels.py  —  Ahead-of-time build of the Numba kernels
+==============================================================
+Compiles the kernels in kernels.py into a native extension module,
+engine_kernels, next to this file.  When it is present, kernels.py
+imports it instead of JIT-compiling, so a fresh API container starts
+without invoking LLVM at all.
+
+AOT kernels are single-threaded (numba.pycc has no parallel target);
+the JIT fallback runs them across all cores.  Build them when cold
+start time matters more than per-query throughput, e.g. for
+autoscaled API workers.
+
+Run (once per target machine / image build):
+    python build_kernels.py
+"""
+
+import os
+
+from numba.pycc import CC
+
+from kernels import (
+    DOT_SIG,
+    POOL_SIG,
+    dot_scores_kernel,
+    mean_pool_normalize_kernel,
+)
+
+cc = CC("engine_kernels")
+cc.output_dir = os.path.dirname(os.path.abspath(__file__))
+
+cc.export("mean_pool_normalize", POOL_SIG)(mean_pool_normalize_kernel)
+cc.export("dot_scores", DOT_SIG)(dot_scores_kernel)
+
+
+if __name__ == "__main__":
+    print("[Build] Compiling engine_kernels …")
+    cc.compile()
+    print(f"[Build] ✓ Wrote engine_kernels to {cc.output_dir}")
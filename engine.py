@@ -1,95 +1,451 @@
 """
 engine.py  —  Segment 2: The Cognitive + Storage Layer
 =======================================================
-• Loads processed_movies.csv
-• Encodes every movie's 'soup' field with sentence-transformers
-  (all-MiniLM-L6-v2  →  384-dim vectors)
-• Stores vectors in a persistent ChromaDB collection
+• Loads processed_movies.parquet  (or a legacy processed_movies.csv)
+• Encodes every movie's 'soup' field with all-MiniLM-L6-v2
+  (384-dim vectors), run through an int8-quantised ONNX Runtime
+  export by default  (EMBED_BACKEND=torch → sentence-transformers)
+• Stores vectors in a persistent hnswlib index with a Parquet
+  metadata table  (VECTOR_BACKEND=chroma → ChromaDB collection)
 • Exposes a recommend() function used by both the API and the UI
 
 Run (one-time indexing):
     python engine.py
 
-The ChromaDB data is written to  ./chroma_store/  so indexing
-only needs to happen once; subsequent runs skip it automatically.
+The index is written to  ./hnsw_store/  (or ./chroma_store/) so
+indexing only needs to happen once; subsequent runs skip it automatically.
+The quantised ONNX model is exported once to  ./onnx_model/ .
 """
 
 import os
-import math
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict
+
+import numpy as np
 import pandas as pd
 import chromadb
-from chromadb.config import Settings
-from sentence_transformers import SentenceTransformer
+import hnswlib                   # from the chroma-hnswlib wheel
+import onnxruntime as ort
+from transformers import AutoTokenizer
 from tqdm import tqdm
 
+from kernels import mean_pool_normalize, top_k
+
 # ── Config ────────────────────────────────────────────────────────────────────
 BASE_DIR        = os.path.dirname(__file__)
-PROCESSED_FILE  = os.path.join(BASE_DIR, "data", "processed_movies.csv")
+PROCESSED_FILE  = os.path.join(BASE_DIR, "data", "processed_movies.parquet")
+PROCESSED_CSV   = os.path.join(BASE_DIR, "data", "processed_movies.csv")   # pre-Parquet output
 CHROMA_DIR      = os.path.join(BASE_DIR, "chroma_store")
+HNSW_DIR        = os.path.join(BASE_DIR, "hnsw_store")
+HNSW_FILE       = os.path.join(HNSW_DIR, "movies.hnsw")
+META_FILE       = os.path.join(HNSW_DIR, "movies_meta.parquet")
+CORPUS_FILE     = os.path.join(HNSW_DIR, "corpus.f16.npy")
+ONNX_DIR        = os.path.join(BASE_DIR, "onnx_model")
+ONNX_FILE       = "model_quantized.onnx"
+ONNX_FILES      = [ONNX_FILE, "tokenizer.json", "tokenizer_config.json"]  # a complete export
 COLLECTION_NAME = "movies"
 MODEL_NAME      = "all-MiniLM-L6-v2"
+MODEL_HUB_ID    = f"sentence-transformers/{MODEL_NAME}"
+EMBED_BACKEND   = os.getenv("EMBED_BACKEND", "onnx")   # "onnx" (int8) | "torch"
+VECTOR_BACKEND  = os.getenv("VECTOR_BACKEND", "hnsw")  # "hnsw" | "chroma"
+VECTOR_DIM      = 384
+# Every stored and query vector is unit-length, so inner product == cosine
+# similarity without the per-distance normalisation "cosine" space does.
+VECTOR_SPACE    = "ip"
+MAX_SEQ_LEN     = 256          # same truncation as the sentence-transformers model
 BATCH_SIZE      = 512          # rows per ChromaDB upsert call
+ENCODE_BATCH    = 128          # texts per model.encode forward pass when indexing
+HNSW_M          = 16           # graph out-degree
+HNSW_EF_BUILD   = 200          # candidate list size while building
+HNSW_EF_SEARCH  = 100          # candidate list size at query time (≥ max n_results)
+BRUTE_FORCE_MAX = int(os.getenv("BRUTE_FORCE_MAX", "100000"))  # exact scan up to this many rows
+META_COLS       = ["title", "clean_title", "year", "genres_clean", "tags"]
+QUERY_BATCH     = 64           # queries per model.encode call in recommend_batch
+QUERY_CACHE_MAX = 4096         # query embeddings kept in the LRU cache
+SEM_CACHE_SIZE  = 1024         # recent (query vector, results) pairs kept
+SEM_CACHE_MIN   = 0.98         # cosine similarity that counts as "same query"
+
+
+# ── Data loading ──────────────────────────────────────────────────────────────
+def load_movies() -> pd.DataFrame:
+    """
+    Load the processed movie table written by pipeline.py.  Reads only the
+    columns the engine uses; falls back to the older CSV output.
+    """
+    columns = ["movieId", *META_COLS, "soup"]
+    if os.path.exists(PROCESSED_FILE):
+        print(f"[Engine] Loading processed data from: {PROCESSED_FILE}")
+        df = pd.read_parquet(PROCESSED_FILE, columns=columns)
+    else:
+        print(f"[Engine] Loading processed data from: {PROCESSED_CSV}")
+        df = pd.read_csv(
+            PROCESSED_CSV,
+            usecols         = columns,
+            dtype           = {c: str for c in columns if c != "movieId"},
+            keep_default_na = False,
+        )
+
+    # The Parquet categoricals only matter on disk: index() turns the table
+    # into plain dicts, so hand back ordinary strings (fillna("") on a
+    # categorical raises when "" is not one of its categories).
+    for col in META_COLS:
+        df[col] = df[col].astype(object).fillna("").astype(str)
+    return df
+
+
+def _write_atomic(path: str, write) -> None:
+    """
+    Call write(tmp_path) on a temp file in path's directory, then move it
+    over path with os.replace, so readers only ever see a complete file.
+    The temp name keeps path's suffix (np.save appends ".npy" otherwise).
+    """
+    head, name = os.path.split(path)
+    fd, tmp = tempfile.mkstemp(dir=head, prefix=".tmp-", suffix=os.path.splitext(name)[1])
+    os.close(fd)
+    try:
+        write(tmp)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+# ── ONNX encoder ──────────────────────────────────────────────────────────────
+def export_quantized_onnx(model_dir: str = ONNX_DIR) -> None:
+    """
+    One-time export of MODEL_NAME to ONNX with dynamic int8 weight
+    quantisation (VNNI kernels on AVX-512 CPUs, plain int8 GEMM elsewhere).
+    Writes ONNX_FILE plus the tokenizer files into model_dir.
+
+    The export is built in a temp directory beside model_dir and renamed
+    into place as the last step, so an interrupted export leaves nothing
+    behind and concurrent workers never load a half-written model: the
+    first to finish wins, the others drop their copy.
+    """
+    # optimum is only needed for the export, never at query time
+    from optimum.onnxruntime import ORTModelForFeatureExtraction, ORTQuantizer
+    from optimum.onnxruntime.configuration import AutoQuantizationConfig
+
+    parent = os.path.dirname(os.path.abspath(model_dir))
+    os.makedirs(parent, exist_ok=True)
+    tmp = tempfile.mkdtemp(dir=parent, prefix=".tmp-onnx-")
+    try:
+        print(f"[Engine] Exporting {MODEL_HUB_ID} to int8 ONNX → {model_dir} …")
+        model     = ORTModelForFeatureExtraction.from_pretrained(MODEL_HUB_ID, export=True)
+        quantizer = ORTQuantizer.from_pretrained(model)
+        qconfig   = AutoQuantizationConfig.avx512_vnni(is_static=False, per_channel=False)
+        quantizer.quantize(save_dir=tmp, quantization_config=qconfig)
+        AutoTokenizer.from_pretrained(MODEL_HUB_ID).save_pretrained(tmp)
+
+        if os.path.isdir(model_dir) and not onnx_export_complete(model_dir):
+            # Left over from an export interrupted before it was atomic
+            shutil.rmtree(model_dir, ignore_errors=True)
+        try:
+            os.replace(tmp, model_dir)
+        except OSError:
+            # model_dir is non-empty: another worker finished first
+            if not onnx_export_complete(model_dir):
+                raise
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def onnx_export_complete(model_dir: str = ONNX_DIR) -> bool:
+    """True if model_dir holds every file OnnxEncoder needs."""
+    return all(os.path.exists(os.path.join(model_dir, f)) for f in ONNX_FILES)
+
+
+class OnnxEncoder:
+    """
+    Drop-in replacement for SentenceTransformer.encode() backed by the
+    int8 ONNX export of MODEL_NAME.  Exports the model on first use.
+    """
+
+    def __init__(self, model_dir: str = ONNX_DIR):
+        model_path = os.path.join(model_dir, ONNX_FILE)
+        if not onnx_export_complete(model_dir):
+            export_quantized_onnx(model_dir)
+
+        self.tokenizer = AutoTokenizer.from_pretrained(model_dir)
+
+        opts = ort.SessionOptions()
+        opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(
+            model_path, opts, providers=["CPUExecutionProvider"],
+        )
+        self.input_names = {i.name for i in self.session.get_inputs()}
+
+    def encode(
+        self,
+        texts: list[str],
+        batch_size: int = 64,
+        show_progress_bar: bool = False,
+        **_,
+    ) -> np.ndarray:
+        """
+        Encode texts into an (N, VECTOR_DIM) float32 array of unit vectors.
+
+        Other SentenceTransformer.encode() keywords are accepted and
+        ignored: the output is always a normalised NumPy array.
+        """
+        out = np.empty((len(texts), VECTOR_DIM), dtype=np.float32)
+
+        # Longest-first so each batch pads to a similar length
+        order   = np.argsort([-len(t) for t in texts], kind="stable")
+        starts  = range(0, len(texts), batch_size)
+        for lo in tqdm(starts, desc="Encoding", disable=not show_progress_bar):
+            idx = order[lo : lo + batch_size]
+            enc = self.tokenizer(
+                [texts[i] for i in idx],
+                padding        = True,
+                truncation     = True,
+                max_length     = MAX_SEQ_LEN,
+                return_tensors = "np",
+            )
+            feeds = {k: v for k, v in enc.items() if k in self.input_names}
+            token_embs = self.session.run(["last_hidden_state"], feeds)[0]
+            out[idx] = mean_pool_normalize(token_embs, enc["attention_mask"])
+
+        return out
+
+
+# ── Semantic cache ────────────────────────────────────────────────────────────
+class _SemCache:
+    """
+    Ring buffer of recent (query vector, results) pairs.  A new query whose
+    unit vector has cosine ≥ SEM_CACHE_MIN with a cached one reuses its
+    results, so near-duplicates ("sad robot" / "a sad robot") skip the
+    index search: one GEMV against ≤ SEM_CACHE_SIZE vectors instead.
+    """
+
+    def __init__(self, capacity: int = SEM_CACHE_SIZE):
+        self.vecs    = np.zeros((capacity, VECTOR_DIM), dtype=np.float32)
+        self.results: list[list[dict] | None] = [None] * capacity
+        self.n_asked = np.zeros(capacity, dtype=np.int64)   # n_results of each entry
+        self.head    = 0
+        self.size    = 0
+        self.lock    = threading.Lock()
+
+    def get(self, q: np.ndarray, n_results: int) -> list[dict] | None:
+        with self.lock:
+            if self.size == 0:
+                return None
+            sims = self.vecs[: self.size] @ q
+            # The closest entry may hold too few results; any other entry
+            # above the threshold with enough of them will do
+            sims[self.n_asked[: self.size] < n_results] = -np.inf
+            j = int(np.argmax(sims))
+            if sims[j] >= SEM_CACHE_MIN:
+                return self.results[j][:n_results]
+            return None
+
+    def put(self, q: np.ndarray, n_results: int, results: list[dict]) -> None:
+        with self.lock:
+            self.vecs[self.head]    = q
+            self.results[self.head] = results
+            self.n_asked[self.head] = n_results
+            self.head = (self.head + 1) % len(self.results)
+            self.size = min(self.size + 1, len(self.results))
+
+    def clear(self) -> None:
+        with self.lock:
+            self.results = [None] * len(self.results)
+            self.head = self.size = 0
 
 
 # ── Engine Class ──────────────────────────────────────────────────────────────
 class SemanticEngine:
     """
     Singleton-style class that:
-      1. Loads the SentenceTransformer model once.
-      2. Opens (or creates) the ChromaDB persistent collection.
-      3. Provides recommend(query, n_results) for any caller.
+      1. Loads the embedding model once (int8 ONNX or SentenceTransformer).
+      2. Opens the persisted hnswlib index + metadata table
+         (or the ChromaDB collection when VECTOR_BACKEND=chroma).
+      3. Provides recommend(query, n_results) and
+         recommend_batch(queries, n_results) for any caller.
+
+    Query embeddings are memoised in a small LRU cache keyed on the
+    normalised query text, so repeat queries skip the transformer, and
+    results are reused for near-identical query vectors (_SemCache).
     """
 
     def __init__(self):
-        print("[Engine] Loading sentence-transformer model …")
-        self.model = SentenceTransformer(MODEL_NAME)
-
-        print("[Engine] Connecting to ChromaDB …")
-        self.client = chromadb.PersistentClient(path=CHROMA_DIR)
-        self.collection = self.client.get_or_create_collection(
-            name=COLLECTION_NAME,
-            metadata={"hnsw:space": "cosine"},   # cosine similarity
-        )
+        if EMBED_BACKEND == "torch":
+            from sentence_transformers import SentenceTransformer
+            print("[Engine] Loading sentence-transformer model …")
+            self.model = SentenceTransformer(MODEL_NAME)
+        else:
+            print("[Engine] Loading int8 ONNX model …")
+            self.model = OnnxEncoder()
+
+        self.collection = None
+        self.hnsw: hnswlib.Index | None = None
+        self.meta: list[dict] = []
+        self.corpus: np.ndarray | None = None    # (N, dim) float16 memmap, small collections only
+
+        if VECTOR_BACKEND == "chroma":
+            print("[Engine] Connecting to ChromaDB …")
+            self.client = chromadb.PersistentClient(path=CHROMA_DIR)
+            # Look the collection up without passing metadata: on an existing
+            # collection get_or_create_collection(metadata=…) would relabel
+            # it while its HNSW segment keeps the old space.
+            try:
+                self.collection = self.client.get_collection(COLLECTION_NAME)
+            except ValueError:    # chromadb 0.5: "Collection … does not exist."
+                self.collection = None
+            else:
+                space = (self.collection.metadata or {}).get("hnsw:space")
+                if space != VECTOR_SPACE:
+                    # The space is fixed at creation: rebuild so index() re-fills it
+                    print(f"[Engine] Collection uses '{space}' space — recreating as '{VECTOR_SPACE}'.")
+                    self.client.delete_collection(COLLECTION_NAME)
+                    self.collection = None
+
+            if self.collection is None:
+                self.collection = self.client.create_collection(
+                    name=COLLECTION_NAME,
+                    metadata={"hnsw:space": VECTOR_SPACE},
+                )
+        elif os.path.exists(HNSW_FILE):
+            print(f"[Engine] Loading hnswlib index from: {HNSW_FILE}")
+            # Graphs saved from a "cosine" index hold unit vectors too,
+            # so they load unchanged into the inner-product space.
+            index = hnswlib.Index(space=VECTOR_SPACE, dim=VECTOR_DIM)
+            index.load_index(HNSW_FILE)
+            self._set_hnsw(index, pd.read_parquet(META_FILE).to_dict(orient="records"))
+            if os.path.exists(CORPUS_FILE) and self._count() <= BRUTE_FORCE_MAX:
+                # Memory-mapped: startup is a page-table setup, not a read
+                self.corpus = np.load(CORPUS_FILE, mmap_mode="r")
+
+        self._query_cache: OrderedDict[str, np.ndarray] = OrderedDict()
+        self._query_lock = threading.Lock()
+        self._sem_cache  = _SemCache()
+
+    def _set_hnsw(self, index: hnswlib.Index, meta: list[dict]) -> None:
+        index.set_ef(HNSW_EF_SEARCH)
+        self.hnsw = index
+        self.meta = meta   # row i ↔ hnsw label i
+
+    def _count(self) -> int:
+        if self.collection is not None:
+            return self.collection.count()
+        return self.hnsw.get_current_count() if self.hnsw is not None else 0
 
     # ── Index ─────────────────────────────────────────────────────────────────
     def index(self, force: bool = False) -> None:
         """
-        Encode all movies and upsert them into ChromaDB.
-        Skips if the collection already has data and force=False.
+        Encode all movies and write them to the vector index.
+        Skips if the index already has data and force=False.
         """
-        existing = self.collection.count()
+        existing = self._count()
         if existing > 0 and not force:
-            print(f"[Engine] Collection already has {existing:,} items — skipping index.")
+            print(f"[Engine] Index already has {existing:,} items — skipping index.")
             print("[Engine] Pass force=True to re-index.")
             return
 
-        print(f"[Engine] Loading processed data from: {PROCESSED_FILE}")
-        df = pd.read_csv(PROCESSED_FILE)
-        df["soup"] = df["soup"].fillna("").astype(str)
-
-        total   = len(df)
-        n_batch = math.ceil(total / BATCH_SIZE)
-        print(f"[Engine] Encoding {total:,} movies in {n_batch} batches …")
+        # Convert the table to plain lists once; the backends only slice them.
+        df      = load_movies()
+        soups   = df["soup"].fillna("").astype(str).tolist()
+        meta    = df[["movieId", *META_COLS]].fillna("").reset_index(drop=True)
+        records = meta.to_dict(orient="records")
 
-        for i in tqdm(range(n_batch), desc="Indexing batches"):
-            batch     = df.iloc[i * BATCH_SIZE : (i + 1) * BATCH_SIZE]
-            soups     = batch["soup"].tolist()
-            ids       = batch["movieId"].astype(str).tolist()
-            metadatas = batch[["title", "clean_title", "year", "genres_clean", "tags"]]\
-                            .fillna("")\
-                            .to_dict(orient="records")
+        # One encode call over the whole corpus; the encoder does its own
+        # micro-batching, and the backends slice the resulting array.
+        print(f"[Engine] Encoding {len(soups):,} movies …")
+        embeddings = self.model.encode(
+            soups,
+            batch_size           = ENCODE_BATCH,
+            convert_to_numpy     = True,
+            normalize_embeddings = True,
+            show_progress_bar    = True,
+        )
 
-            embeddings = self.model.encode(soups, show_progress_bar=False).tolist()
+        if self.collection is not None:
+            self._index_chroma(soups, records, embeddings)
+        else:
+            self._index_hnsw(meta, records, embeddings)
+        self._sem_cache.clear()   # cached results predate the new index
 
+    def _index_chroma(
+        self, soups: list[str], records: list[dict], embeddings: np.ndarray,
+    ) -> None:
+        ids   = [str(r["movieId"]) for r in records]
+        total = len(records)
+        for lo in tqdm(range(0, total, BATCH_SIZE), desc="Upserting batches"):
+            hi = lo + BATCH_SIZE
             self.collection.upsert(
-                ids        = ids,
-                embeddings = embeddings,
-                documents  = soups,
-                metadatas  = metadatas,
+                ids        = ids[lo:hi],
+                embeddings = embeddings[lo:hi].tolist(),
+                documents  = soups[lo:hi],
+                metadatas  = records[lo:hi],
             )
 
         print(f"[Engine] ✓ Indexed {self.collection.count():,} movies into ChromaDB.")
 
+    def _index_hnsw(
+        self, meta: pd.DataFrame, records: list[dict], embeddings: np.ndarray,
+    ) -> None:
+        total = len(records)
+        print("[Engine] Building hnswlib index …")
+        index = hnswlib.Index(space=VECTOR_SPACE, dim=VECTOR_DIM)
+        index.init_index(max_elements=total, ef_construction=HNSW_EF_BUILD, M=HNSW_M)
+        index.add_items(embeddings, np.arange(total))
+
+        # Labels are row positions, so metadata lookup is a list index
+        # Each file is written beside its target and swapped in with
+        # os.replace: a live corpus memmap keeps reading the old inode
+        # instead of seeing the file rewritten under it.
+        os.makedirs(HNSW_DIR, exist_ok=True)
+        _write_atomic(HNSW_FILE, index.save_index)
+        _write_atomic(META_FILE, lambda tmp: meta.to_parquet(tmp, index=False))
+        _write_atomic(CORPUS_FILE, lambda tmp: np.save(tmp, embeddings.astype(np.float16)))
+        self._set_hnsw(index, records)
+        if total <= BRUTE_FORCE_MAX:
+            self.corpus = np.load(CORPUS_FILE, mmap_mode="r")
+
+        print(f"[Engine] ✓ Indexed {index.get_current_count():,} movies into {HNSW_FILE}.")
+
+    # ── Query encoding ────────────────────────────────────────────────────────
+    @staticmethod
+    def _cache_key(query: str) -> str:
+        """Case/whitespace-normalise a query (MiniLM is uncased)."""
+        return " ".join(query.lower().split())
+
+    def encode_queries(self, queries: list[str]) -> np.ndarray:
+        """
+        Return one normalised embedding per query, shape (len(queries), 384).
+
+        Cached queries are served from the LRU; all misses are encoded
+        together in a single model.encode call.
+        """
+        keys = [self._cache_key(q) for q in queries]
+
+        with self._query_lock:
+            cached = {k: self._query_cache[k] for k in keys if k in self._query_cache}
+            for k in cached:
+                self._query_cache.move_to_end(k)
+
+        misses = list(dict.fromkeys(k for k in keys if k not in cached))
+        if misses:
+            vecs = self.model.encode(
+                misses,
+                batch_size           = QUERY_BATCH,
+                convert_to_numpy     = True,
+                normalize_embeddings = True,
+                show_progress_bar    = False,
+            )
+            with self._query_lock:
+                for k, v in zip(misses, vecs):
+                    v.setflags(write=False)
+                    cached[k] = v
+                    self._query_cache[k] = v
+                while len(self._query_cache) > QUERY_CACHE_MAX:
+                    self._query_cache.popitem(last=False)
+
+        return np.stack([cached[k] for k in keys])
+
     # ── Recommend ─────────────────────────────────────────────────────────────
     def recommend(self, query: str, n_results: int = 10) -> list[dict]:
         """
@@ -102,19 +458,76 @@ class SemanticEngine:
             "genres"      : str,
             "tags"        : str,
             "score"       : float,   # 0-1, higher = more similar
-            "distance"    : float,   # raw cosine distance from ChromaDB
+            "distance"    : float,   # 1 - cosine similarity, from the index
           }
         """
-        query_vec = self.model.encode([query]).tolist()
+        return self.recommend_batch([query], n_results)[0]
 
-        results = self.collection.query(
-            query_embeddings = query_vec,
-            n_results        = n_results,
-            include          = ["metadatas", "distances"],
-        )
+    def recommend_batch(self, queries: list[str], n_results: int = 10) -> list[list[dict]]:
+        """
+        Same as recommend(), but for many queries at once: one encode call
+        and one index query for the whole batch.  Returns one result list
+        per input query, in order.
+        """
+        if not queries:
+            return []
+
+        query_vecs = self.encode_queries(queries)
+
+        batch = [self._sem_cache.get(q, n_results) for q in query_vecs]
+
+        # Concurrent identical requests often land in one batch: search each
+        # distinct query once and cache it once, then share the hits
+        todo: dict[str, list[int]] = {}
+        for i, hits in enumerate(batch):
+            if hits is None:
+                todo.setdefault(self._cache_key(queries[i]), []).append(i)
+        if todo:
+            first = [ids[0] for ids in todo.values()]
+            for ids, hits in zip(todo.values(), self._search(query_vecs[first], n_results)):
+                self._sem_cache.put(query_vecs[ids[0]], n_results, hits)
+                for i in ids:
+                    batch[i] = hits
+
+        return batch
+
+    def _search(self, query_vecs: np.ndarray, n_results: int) -> list[list[dict]]:
+        """Nearest-neighbour lookup in whichever backend is active."""
+        if self.collection is not None:
+            results = self.collection.query(
+                query_embeddings = query_vecs.tolist(),
+                n_results        = n_results,
+                include          = ["metadatas", "distances"],
+            )
+            return [
+                self._format_hits(metas, dists)
+                for metas, dists in zip(results["metadatas"], results["distances"])
+            ]
+
+        k = min(n_results, self._count())
+        if k == 0:
+            return [[] for _ in query_vecs]
+
+        if self.corpus is not None:
+            rows, scores = top_k(self.corpus, query_vecs, k)
+            # float16 rounding leaves corpus vectors a hair off unit length,
+            # so an exact match can score 1.0001: clamp to a valid cosine
+            scores = np.clip(scores, -1.0, 1.0)
+            return [
+                self._format_hits([self.meta[i] for i in row_ids], (1 - row_scores).tolist())
+                for row_ids, row_scores in zip(rows, scores)
+            ]
+
+        labels, dists = self.hnsw.knn_query(query_vecs, k=k)
+        return [
+            self._format_hits([self.meta[i] for i in row_labels], row_dists.tolist())
+            for row_labels, row_dists in zip(labels, dists)
+        ]
 
+    @staticmethod
+    def _format_hits(metas: list[dict], dists: list[float]) -> list[dict]:
         recommendations = []
-        for meta, dist in zip(results["metadatas"][0], results["distances"][0]):
+        for meta, dist in zip(metas, dists):
             score = round(1 - dist, 4)   # cosine similarity  (1 = identical)
             recommendations.append({
                 "title"   : meta.get("title",        "N/A"),
@@ -132,9 +545,9 @@ class SemanticEngine:
         """Return basic collection stats."""
         return {
             "collection"   : COLLECTION_NAME,
-            "total_movies" : self.collection.count(),
+            "total_movies" : self._count(),
             "model"        : MODEL_NAME,
-            "vector_dim"   : 384,
+            "vector_dim"   : VECTOR_DIM,
         }
 
 
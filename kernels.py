@@ -0,0 +1,124 @@
+"""
+kernels.py  —  Numba kernels for the engine's numeric hot paths
+================================================================
+• mean_pool_normalize() — masked mean-pool + L2-normalise of the
+  transformer's token embeddings in a single pass per row
+• top_k()               — exact inner-product top-k of a query batch
+  over an in-RAM (or memory-mapped float16) corpus matrix — brute-force
+  search for small collections
+
+If the ahead-of-time module built by build_kernels.py (engine_kernels)
+is importable, its compiled kernels are used and LLVM is never invoked
+at startup.  Otherwise the kernels are JIT-compiled eagerly at import
+from explicit signatures and cached to __pycache__/, so no request ever
+pays the compile cost.
+"""
+
+import math
+
+import numpy as np
+from numba import njit, prange
+
+# Kernel signatures, shared with the AOT build in build_kernels.py
+POOL_SIG = "void(f4[:, :, ::1], i8[:, ::1], f4[:, ::1])"
+DOT_SIG  = "void(f4[:, ::1], f4[:, ::1], f4[:, ::1])"
+
+# Rows of a float16 corpus upcast per block (~6 MB float32 scratch)
+CHUNK_ROWS = 4096
+
+
+# ── Kernel source ─────────────────────────────────────────────────────────────
+# Plain Python so the same code can be JIT- or AOT-compiled; prange acts
+# as range when compiled without parallel=True.
+def mean_pool_normalize_kernel(tok, mask, out):
+    B, T, D = tok.shape
+    for b in prange(B):
+        for d in range(D):
+            out[b, d] = 0.0
+        for t in range(T):
+            if mask[b, t]:
+                for d in range(D):
+                    out[b, d] += tok[b, t, d]
+
+        # Dividing by the token count is redundant: L2 normalisation
+        # cancels any positive scale, so normalise the masked sum directly.
+        s = 0.0
+        for d in range(D):
+            s += out[b, d] * out[b, d]
+        if s > 0.0:
+            inv = 1.0 / math.sqrt(s)
+            for d in range(D):
+                out[b, d] *= inv
+
+
+def dot_scores_kernel(X, Q, out):
+    # out[i, j] = X[i] · Q[j]; each corpus row is read once for all queries
+    N, D = X.shape
+    for i in prange(N):
+        for j in range(Q.shape[0]):
+            acc = np.float32(0.0)
+            for d in range(D):
+                acc += X[i, d] * Q[j, d]
+            out[i, j] = acc
+
+
+# ── Compiled kernels ──────────────────────────────────────────────────────────
+try:
+    from engine_kernels import dot_scores as _dot_scores
+    from engine_kernels import mean_pool_normalize as _mean_pool_normalize
+except ImportError:
+    _mean_pool_normalize = njit(POOL_SIG, parallel=True, fastmath=True, cache=True)(
+        mean_pool_normalize_kernel
+    )
+    _dot_scores = njit(DOT_SIG, parallel=True, fastmath=True, cache=True)(
+        dot_scores_kernel
+    )
+
+
+# ── Pooling ───────────────────────────────────────────────────────────────────
+def mean_pool_normalize(token_embs: np.ndarray, mask: np.ndarray) -> np.ndarray:
+    """
+    Masked mean over the token axis followed by L2 normalisation.
+
+    token_embs : (batch, tokens, dim) float32
+    mask       : (batch, tokens)      attention mask (1 = real token)
+    """
+    tok = np.ascontiguousarray(token_embs, dtype=np.float32)
+    m   = np.ascontiguousarray(mask, dtype=np.int64)
+    out = np.empty((tok.shape[0], tok.shape[2]), dtype=np.float32)
+    _mean_pool_normalize(tok, m, out)
+    return out
+
+
+# ── Brute-force search ────────────────────────────────────────────────────────
+def top_k(X: np.ndarray, Q: np.ndarray, k: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Exact top-k rows of X by inner product with each query in Q, best first.
+
+    X : (N, dim) float32, or float16 (e.g. a memory-mapped corpus)
+    Q : (n_queries, dim) float32
+    Returns (row indices, scores), each (n_queries, k).  With unit
+    vectors the score is the cosine similarity.
+    """
+    N   = X.shape[0]
+    Q   = np.ascontiguousarray(Q, dtype=np.float32)
+    out = np.empty((N, Q.shape[0]), dtype=np.float32)
+
+    if X.dtype == np.float32 and X.flags.c_contiguous:
+        _dot_scores(X, Q, out)
+    else:
+        # Numba has no CPU float16 type: upcast one CHUNK_ROWS block at a
+        # time with NumPy's vectorised cast, then score it.  Only half the
+        # bytes are read from memory; the arithmetic stays float32.
+        buf = np.empty((min(CHUNK_ROWS, N), X.shape[1]), dtype=np.float32)
+        for lo in range(0, N, CHUNK_ROWS):
+            blk    = buf[: min(CHUNK_ROWS, N - lo)]
+            blk[:] = X[lo : lo + len(blk)]
+            _dot_scores(blk, Q, out[lo : lo + len(blk)])
+
+    scores = out.T
+    k      = min(k, N)
+    idx    = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    top    = np.take_along_axis(scores, idx, axis=1)
+    order  = np.argsort(-top, axis=1, kind="stable")
+    return np.take_along_axis(idx, order, axis=1), np.take_along_axis(top, order, axis=1)
@@ -3,7 +3,7 @@ pipeline.py  —  Segment 1: The Ingestion / ETL Layer
 =====================================================
 Reads the raw MovieLens CSVs from archive (9)/, cleans and
 enriches the text metadata, then saves a single processed
-file  →  data/processed_movies.csv  that the engine uses.
+file  →  data/processed_movies.parquet  that the engine uses.
 
 Run:
     python pipeline.py
@@ -12,27 +12,45 @@ Run:
 import re
 import os
 import pandas as pd
-from tqdm import tqdm
 
 # ── Paths ────────────────────────────────────────────────────────────────────
 RAW_DIR       = os.path.join(os.path.dirname(__file__), "archive (9)")
 PROCESSED_DIR = os.path.join(os.path.dirname(__file__), "data")
-OUTPUT_FILE   = os.path.join(PROCESSED_DIR, "processed_movies.csv")
+OUTPUT_FILE   = os.path.join(PROCESSED_DIR, "processed_movies.parquet")
+
+# Low-cardinality columns are stored dictionary-encoded
+OUTPUT_DTYPES = {
+    "year"         : "category",
+    "genres_clean" : "category",
+    "soup"         : "string[pyarrow]",
+}
+
+# Trailing "(1995)" on a MovieLens title; group 1 is the year
+YEAR_RE = re.compile(r"\s*\((\d{4})\)\s*$")
 
 
 # ── Helpers ───────────────────────────────────────────────────────────────────
 def clean_title(title: str) -> str:
     """Remove year from title and strip extra whitespace."""
-    title = re.sub(r"\(\d{4}\)\s*$", "", title).strip()
-    return title
+    return YEAR_RE.sub("", title).strip()
 
 
 def extract_year(title: str) -> str:
     """Extract the 4-digit year that usually lives at the end of a title."""
-    match = re.search(r"\((\d{4})\)\s*$", title)
+    match = YEAR_RE.search(title)
     return match.group(1) if match else "Unknown"
 
 
+def clean_titles(titles: pd.Series) -> pd.Series:
+    """Vectorised clean_title() over a whole column."""
+    return titles.str.replace(YEAR_RE, "", regex=True).str.strip()
+
+
+def extract_years(titles: pd.Series) -> pd.Series:
+    """Vectorised extract_year() over a whole column."""
+    return titles.str.extract(YEAR_RE, expand=False).fillna("Unknown")
+
+
 def format_genres(genres: str) -> str:
     """Convert 'Action|Crime|Thriller' → 'Action Crime Thriller'."""
     if pd.isna(genres) or genres == "(no genres listed)":
@@ -43,26 +61,12 @@ def format_genres(genres: str) -> str:
 def aggregate_tags(tags_df: pd.DataFrame) -> pd.Series:
     """
     For every movieId, join all user-supplied tags into a single
-    lowercased, deduplicated string.
-    """
-    def _join(grp):
-        unique_tags = grp["tag"].dropna().astype(str).str.lower().unique()
-        return " ".join(unique_tags)
-
-    return tags_df.groupby("movieId").apply(_join, include_groups=False).rename("tags")
-
-
-def build_soup(row: pd.Series) -> str:
-    """
-    Merge title + genres + tags into one rich text field (the 'soup')
-    that the transformer will encode.
+    lowercased, deduplicated string (first-seen order is kept).
     """
-    parts = [
-        row["clean_title"],
-        row["genres_clean"],
-        row.get("tags", ""),
-    ]
-    return " ".join(p for p in parts if p).strip()
+    tags = tags_df[["movieId", "tag"]].dropna()
+    tags = tags.assign(tag=tags["tag"].astype(str).str.lower())
+    tags = tags.drop_duplicates(["movieId", "tag"])
+    return tags.groupby("movieId", sort=False)["tag"].agg(" ".join).rename("tags")
 
 
 # ── Main ──────────────────────────────────────────────────────────────────────
@@ -82,9 +86,8 @@ def run_pipeline() -> None:
 
     # 2. Clean movies
     print("\n[2/5] Cleaning movie metadata …")
-    tqdm.pandas(desc="      processing titles")
-    movies_df["clean_title"]  = movies_df["title"].progress_apply(clean_title)
-    movies_df["year"]         = movies_df["title"].apply(extract_year)
+    movies_df["clean_title"]  = clean_titles(movies_df["title"])
+    movies_df["year"]         = extract_years(movies_df["title"])
     movies_df["genres_clean"] = movies_df["genres"].apply(format_genres)
 
     # 3. Aggregate tags
@@ -93,16 +96,23 @@ def run_pipeline() -> None:
     movies_df  = movies_df.join(tag_series, on="movieId")
     movies_df["tags"] = movies_df["tags"].fillna("")
 
-    # 4. Build the text soup
+    # 4. Build the text soup: title + genres + tags in one rich text
+    #    field that the transformer will encode
     print("\n[4/5] Building content soup …")
-    tqdm.pandas(desc="      building soup")
-    movies_df["soup"] = movies_df.progress_apply(build_soup, axis=1)
+    movies_df["soup"] = (
+        movies_df["clean_title"]
+        .str.cat([movies_df["genres_clean"], movies_df["tags"]], sep=" ", na_rep="")
+        .str.replace(r"\s+", " ", regex=True)
+        .str.strip()
+    )
 
     # 5. Save
     print("\n[5/5] Saving processed data …")
     keep_cols = ["movieId", "title", "clean_title", "year",
                  "genres_clean", "tags", "soup"]
-    movies_df[keep_cols].to_csv(OUTPUT_FILE, index=False)
+    movies_df[keep_cols].astype(OUTPUT_DTYPES).to_parquet(
+        OUTPUT_FILE, engine="pyarrow", compression="zstd", index=False,
+    )
     print(f"      ✓ Saved {len(movies_df):,} movies → {OUTPUT_FILE}")
 
     print("\n  Pipeline complete.\n")
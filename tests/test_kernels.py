@@ -0,0 +1,82 @@
+"""
+Checks the Numba kernels in kernels.py against plain NumPy references.
+"""
+
+import numpy as np
+import pytest
+
+from kernels import CHUNK_ROWS, mean_pool_normalize, top_k
+
+DIM = 384
+
+
+def _unit(a: np.ndarray) -> np.ndarray:
+    return (a / np.linalg.norm(a, axis=1, keepdims=True)).astype(np.float32)
+
+
+def _reference_top_k(X: np.ndarray, Q: np.ndarray, k: int) -> tuple[np.ndarray, np.ndarray]:
+    scores = X.astype(np.float32) @ Q.T                    # (N, n_queries)
+    idx    = np.argsort(-scores.T, axis=1, kind="stable")[:, :k]
+    return idx, np.take_along_axis(scores.T, idx, axis=1)
+
+
+# ── Pooling ───────────────────────────────────────────────────────────────────
+def test_mean_pool_normalize_matches_numpy():
+    rng  = np.random.default_rng(0)
+    tok  = rng.standard_normal((4, 12, DIM)).astype(np.float32)
+    mask = np.ones((4, 12), dtype=np.int64)
+    mask[1, 7:] = 0                                        # padded row
+    mask[2, ::2] = 0                                       # non-contiguous mask
+    mask[3] = 0                                            # nothing to pool
+
+    m        = mask[:, :, None].astype(np.float32)
+    mean     = (tok * m).sum(axis=1) / np.clip(m.sum(axis=1), 1e-9, None)
+    norm     = np.linalg.norm(mean, axis=1, keepdims=True)
+    expected = np.divide(mean, norm, out=np.zeros_like(mean), where=norm > 0)
+
+    out = mean_pool_normalize(tok, mask)
+    assert out.shape == (4, DIM)
+    assert out.dtype == np.float32
+    np.testing.assert_allclose(out, expected, rtol=1e-5, atol=1e-6)
+    assert not out[3].any()                                # all-zero mask → zero vector
+
+
+# ── Brute-force search ────────────────────────────────────────────────────────
+@pytest.mark.parametrize("n_rows", [50, CHUNK_ROWS + 37])   # single and multi-block
+def test_top_k_float32_matches_argsort(n_rows):
+    rng = np.random.default_rng(1)
+    X   = _unit(rng.standard_normal((n_rows, DIM)))
+    Q   = _unit(rng.standard_normal((3, DIM)))
+
+    idx, scores = top_k(X, Q, 10)
+    ref_idx, ref_scores = _reference_top_k(X, Q, 10)
+    assert idx.shape == scores.shape == (3, 10)
+    np.testing.assert_array_equal(idx, ref_idx)
+    np.testing.assert_allclose(scores, ref_scores, rtol=1e-5, atol=1e-6)
+
+
+@pytest.mark.parametrize("n_rows", [50, CHUNK_ROWS + 37])
+def test_top_k_memmapped_float16_matches_argsort(tmp_path, n_rows):
+    rng  = np.random.default_rng(2)
+    path = tmp_path / "corpus.f16.npy"
+    np.save(path, _unit(rng.standard_normal((n_rows, DIM))).astype(np.float16))
+    X = np.load(path, mmap_mode="r")
+    Q = _unit(rng.standard_normal((3, DIM)))
+
+    idx, scores = top_k(X, Q, 10)
+    ref_idx, ref_scores = _reference_top_k(np.asarray(X), Q, 10)
+    np.testing.assert_array_equal(idx, ref_idx)
+    np.testing.assert_allclose(scores, ref_scores, rtol=1e-5, atol=1e-6)
+
+
+@pytest.mark.parametrize("dtype", [np.float32, np.float16])
+def test_top_k_clamps_k_to_corpus_size(dtype):
+    rng = np.random.default_rng(3)
+    X   = _unit(rng.standard_normal((5, DIM))).astype(dtype)
+    Q   = _unit(rng.standard_normal((2, DIM)))
+
+    idx, scores = top_k(X, Q, 20)
+    ref_idx, ref_scores = _reference_top_k(X, Q, 5)
+    assert idx.shape == scores.shape == (2, 5)
+    np.testing.assert_array_equal(idx, ref_idx)
+    np.testing.assert_allclose(scores, ref_scores, rtol=1e-5, atol=1e-6)